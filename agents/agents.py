@@ -8,14 +8,23 @@ Structure:
 - app/activity_queue.py         -> Queue message activity
 """
 
-import json
+import base64
+import hashlib
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
 import azure.functions as func
 import azure.durable_functions as df
 
 from shared import json_response
 from webhooks.utility.util_service_bus import ensure_queue_exists
 
+logger = logging.getLogger(__name__)
+
 
 # =============================================================================
 # BLUEPRINT
@@ -34,13 +43,141 @@ REQUIRED_QUEUES = [
     "agent-tasks",
     "agent-results",
 ]
-for queue_name in REQUIRED_QUEUES:
-    ensure_queue_exists(queue_name)
+
+# Queues don't disappear: once verified, later worker starts skip the
+# management-plane calls (queue_message still ensures its targets lazily).
+# The marker is keyed by the queue list so adding a queue re-runs the check.
+_QUEUES_DIGEST = hashlib.blake2b(",".join(sorted(REQUIRED_QUEUES)).encode(), digest_size=8).hexdigest()
+QUEUES_OK_MARKER = f"/tmp/.queues_ok_{_QUEUES_DIGEST}"
+
+
+def _ensure_required_queues() -> None:
+    if os.environ.get("AGENT_SKIP_QUEUE_ENSURE") == "1" or os.path.exists(QUEUES_OK_MARKER):
+        return
+
+    results = [ensure_queue_exists(queue_name) for queue_name in REQUIRED_QUEUES]
+    if not all(results):
+        return
+
+    os.environ["AGENT_SKIP_QUEUE_ENSURE"] = "1"
+    try:
+        with open(QUEUES_OK_MARKER, "w"):
+            pass
+    except OSError as e:
+        logger.warning("Could not write queue marker %s: %s", QUEUES_OK_MARKER, e)
+
+
+_ensure_required_queues()
+
+
+# =============================================================================
+# ORCHESTRATION START DEDUPLICATION
+# =============================================================================
+
+RECENT_STARTS_CAPACITY = 10_000
+RECENT_STARTS_TTL_SECONDS = 60
+
+_recent_starts: OrderedDict[str, float] = OrderedDict()
+_recent_starts_lock = threading.Lock()
+
+# Skipped duplicate starts, by where they were caught (local LRU / Durable)
+dedup_counts: dict[str, int] = {"local": 0, "durable": 0}
+
+
+def _count_duplicate(source: str) -> int:
+    with _recent_starts_lock:
+        dedup_counts[source] += 1
+        return dedup_counts[source]
+
+
+def _is_duplicate_instance_error(error: Exception) -> bool:
+    """
+    Durable Python has no typed exception for an existing instance; the
+    extension reports "An Orchestration instance with the status ... already exists."
+    """
+    message = str(error)
+    return "Orchestration instance with the status" in message and "already exists" in message
+
+
+def _claim_start(instance_id: str) -> bool:
+    """
+    Record instance_id in the local LRU of recent starts.
+    Returns False if it was already started within the TTL.
+    """
+    now = time.monotonic()
+    with _recent_starts_lock:
+        started_at = _recent_starts.get(instance_id)
+        if started_at is not None and now - started_at < RECENT_STARTS_TTL_SECONDS:
+            return False
+
+        _recent_starts[instance_id] = now
+        _recent_starts.move_to_end(instance_id)
+        while len(_recent_starts) > RECENT_STARTS_CAPACITY:
+            _recent_starts.popitem(last=False)
+        return True
+
+
+def _release_start(instance_id: str) -> None:
+    """Forget a claimed start so a redelivered message can retry it."""
+    with _recent_starts_lock:
+        _recent_starts.pop(instance_id, None)
+
+
+def _instance_id(prefix: str, *parts) -> str:
+    """
+    Deterministic, fixed-length instance id: prefix + 80-bit blake2b of parts.
+    Short uniform ids spread evenly over Durable control-queue partitions.
+    """
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=10).digest()
+    return f"{prefix}-{base64.urlsafe_b64encode(digest).decode().rstrip('=')}"
+
+
+async def _start_orchestration(
+    client: df.DurableOrchestrationClient,
+    instance_id: str,
+    client_input: dict,
+    local_dedup: bool = True
+) -> bool:
+    """
+    Start main_orchestrator under a deterministic instance_id.
+
+    Relies on start_new rejecting ids of running instances
+    (overridableExistingInstanceStates=NonRunningStates in host.json)
+    instead of a get_status round-trip. Returns False for duplicates.
+
+    Pass local_dedup=False when the id was derived from a defaulted message
+    id: distinct messages then share one instance_id, and only the Durable
+    running-instance check should apply.
+    """
+    if local_dedup and not _claim_start(instance_id):
+        count = _count_duplicate("local")
+        logger.warning("Orchestration %s recently started, skipping (local dedup total=%s)", instance_id, count)
+        return False
+
+    try:
+        await client.start_new(
+            "main_orchestrator",
+            instance_id=instance_id,
+            client_input=client_input
+        )
+    except Exception as e:
+        if _is_duplicate_instance_error(e):
+            count = _count_duplicate("durable")
+            logger.warning("Orchestration %s already running (durable dedup total=%s)", instance_id, count)
+            return False
+        if local_dedup:
+            _release_start(instance_id)
+        raise
+
+    return True
 
 
 # =============================================================================
 # SERVICE BUS TRIGGERS
 # =============================================================================
+# host.json enables prefetchCount=100 / maxConcurrentCalls=32, so these
+# consumers run concurrently within a worker. Keep them re-entrant: no
+# per-message module state beyond the lock-guarded _recent_starts LRU.
 
 @bp.service_bus_queue_trigger(
     arg_name="msg",
@@ -54,33 +191,20 @@ async def orchestrator_queue_consumer(msg: func.ServiceBusMessage, client: df.Du
     Receives triage requests and starts the main orchestration.
     """
     try:
-        body = json.loads(msg.get_body().decode('utf-8'))
+        body = orjson.loads(msg.get_body())
         event_type = body.get("event_type", "unknown")
         event_id = body.get("event_id", "unknown")
 
-        logging.info(f"Orchestrator queue: event_type={event_type}, event_id={event_id}")
-
-        instance_id = f"orchestrate-{event_type}-{event_id}"
+        logger.info("Orchestrator queue: event_type=%s, event_id=%s", event_type, event_id)
 
-        # Check if already running
-        status = await client.get_status(instance_id)
-        if status and status.runtime_status in [
-            df.OrchestrationRuntimeStatus.Running,
-            df.OrchestrationRuntimeStatus.Pending,
-        ]:
-            logging.warning(f"Orchestration {instance_id} already running")
-            return
+        instance_id = _instance_id("orc", event_type, event_id)
 
-        await client.start_new(
-            "main_orchestrator",
-            instance_id=instance_id,
-            client_input=body
-        )
-
-        logging.info(f"Started orchestration: {instance_id}")
+        has_id = body.get("event_id") is not None
+        if await _start_orchestration(client, instance_id, body, local_dedup=has_id):
+            logger.info("Started orchestration: %s (event_type=%s, event_id=%s)", instance_id, event_type, event_id)
 
     except Exception as e:
-        logging.exception(f"Failed to process orchestrator queue message: {e}")
+        logger.exception("Failed to process orchestrator queue message: %s", e)
         raise
 
 
@@ -96,32 +220,20 @@ async def task_queue_consumer(msg: func.ServiceBusMessage, client: df.DurableOrc
     Receives sub-agent task requests from the orchestrator.
     """
     try:
-        body = json.loads(msg.get_body().decode('utf-8'))
+        body = orjson.loads(msg.get_body())
         agent_type = body.get("agent_type")
         task_id = body.get("task_id", "unknown")
 
-        logging.info(f"Task queue: agent={agent_type}, task_id={task_id}")
-
-        instance_id = f"task-{agent_type}-{task_id}"
+        logger.info("Task queue: agent=%s, task_id=%s", agent_type, task_id)
 
-        status = await client.get_status(instance_id)
-        if status and status.runtime_status in [
-            df.OrchestrationRuntimeStatus.Running,
-            df.OrchestrationRuntimeStatus.Pending,
-        ]:
-            logging.warning(f"Task orchestration {instance_id} already running")
-            return
-
-        await client.start_new(
-            "main_orchestrator",
-            instance_id=instance_id,
-            client_input=body
-        )
+        instance_id = _instance_id("tsk", agent_type, task_id)
 
-        logging.info(f"Started task orchestration: {instance_id}")
+        has_id = body.get("task_id") is not None
+        if await _start_orchestration(client, instance_id, body, local_dedup=has_id):
+            logger.info("Started task orchestration: %s (agent=%s, task_id=%s)", instance_id, agent_type, task_id)
 
     except Exception as e:
-        logging.exception(f"Failed to process task queue message: {e}")
+        logger.exception("Failed to process task queue message: %s", e)
         raise
 
 
@@ -136,24 +248,24 @@ async def result_queue_consumer(msg: func.ServiceBusMessage):
     Receives completed task results for logging and downstream processing.
     """
     try:
-        body = json.loads(msg.get_body().decode('utf-8'))
+        body = orjson.loads(msg.get_body())
         agent_type = body.get("agent_type", "unknown")
         status = body.get("status", "unknown")
 
-        logging.info(f"Result received: agent={agent_type}, status={status}")
+        logger.info("Result received: agent=%s, status=%s", agent_type, status)
 
         # Log to Cosmos DB for audit trail
         try:
-            from shared.util_cosmos import log_event
-            log_event("agent-events", {
+            from shared.util_cosmos import log_event_async
+            log_event_async("agent-events", {
                 "event_type": "agent_result",
                 **body
             })
         except Exception as e:
-            logging.warning(f"Failed to log result to Cosmos: {e}")
+            logger.warning("Failed to log result to Cosmos: %s", e)
 
     except Exception as e:
-        logging.exception(f"Failed to process result queue message: {e}")
+        logger.exception("Failed to process result queue message: %s", e)
         raise
 
 
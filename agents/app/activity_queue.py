@@ -1,58 +1,279 @@
 """
 Queue Message Activity - Send messages to Service Bus queues.
+
+The async Service Bus client and per-queue senders are created once per
+event loop and reused across invocations (AMQP connection setup is the
+dominant cost of a small send). Retries are handled by the SDK's retry
+policy, and sends never block a worker thread.
+
+Outbound messages are coalesced per queue and flushed as message batches
+every SB_BATCH_INTERVAL_MS (default 100 ms). Set it to 0 to send each
+message immediately, or pass flush_now=True for ordering-sensitive sends.
 """
 
-import json
+import asyncio
+import atexit
 import logging
 import os
-import time
+import threading
+from weakref import WeakKeyDictionary
 
-from azure.servicebus import ServiceBusClient, ServiceBusMessage
+import orjson
+
+from azure.core.credentials import AzureNamedKeyCredential, AzureSasCredential
+from azure.servicebus import ServiceBusMessage, parse_connection_string
+from azure.servicebus.aio import ServiceBusClient, ServiceBusSender
+from azure.servicebus.exceptions import MessageSizeExceededError
 
 from agents.agents import bp
+from webhooks.utility.util_service_bus import ensure_queue_exists
+
+logger = logging.getLogger(__name__)
 
 SERVICE_BUS_CONNECTION_STRING = os.environ.get("SERVICE_BUS_CONNECTION_STRING")
 
+# Client-side batching interval (0 disables coalescing)
+SB_BATCH_INTERVAL_MS = int(os.environ.get("SB_BATCH_INTERVAL_MS", "100"))
+
+
+def _parse_connection_string(conn_str: str) -> tuple[str, AzureNamedKeyCredential | AzureSasCredential]:
+    """Split a Service Bus connection string into namespace and credential."""
+    props = parse_connection_string(conn_str)
+    if props.shared_access_signature:
+        return props.fully_qualified_namespace, AzureSasCredential(props.shared_access_signature)
+    return props.fully_qualified_namespace, AzureNamedKeyCredential(
+        props.shared_access_key_name, props.shared_access_key
+    )
+
+
+# Parsed once at import; clients are built from these on first send
+_SB_NAMESPACE: str | None = None
+_SB_CREDENTIAL: AzureNamedKeyCredential | AzureSasCredential | None = None
+if SERVICE_BUS_CONNECTION_STRING:
+    try:
+        _SB_NAMESPACE, _SB_CREDENTIAL = _parse_connection_string(SERVICE_BUS_CONNECTION_STRING)
+    except ValueError as e:
+        logger.error("Invalid SERVICE_BUS_CONNECTION_STRING: %s", e)
+
+
+class _LoopSender:
+    """
+    Client, senders and pending batches bound to a single event loop. Holds no
+    reference to the loop itself, so its _loop_senders entry dies with the loop.
+    """
+
+    def __init__(self):
+        self.client: ServiceBusClient | None = None
+        self.senders: dict[str, ServiceBusSender] = {}
+        self.pending: dict[str, list[ServiceBusMessage]] = {}
+        self.flush_handles: dict[str, asyncio.TimerHandle] = {}
+        self.flush_tasks: set[asyncio.Task] = set()
+
+    def get_sender(self, queue_name: str) -> ServiceBusSender:
+        sender = self.senders.get(queue_name)
+        if sender is not None:
+            return sender
+
+        if self.client is None:
+            if _SB_CREDENTIAL is None:
+                raise RuntimeError("Service Bus credentials not available")
+            self.client = ServiceBusClient(
+                _SB_NAMESPACE,
+                _SB_CREDENTIAL,
+                retry_total=3,
+                retry_backoff_factor=0.8,
+                retry_backoff_max=10,
+            )
+
+        sender = self.client.get_queue_sender(queue_name)
+        self.senders[queue_name] = sender
+        return sender
+
+    async def fits(self, queue_name: str, message: ServiceBusMessage) -> bool:
+        """Whether a message fits in an (empty) message batch for the queue."""
+        probe = await self.get_sender(queue_name).create_message_batch()
+        try:
+            probe.add_message(message)
+            return True
+        except MessageSizeExceededError:
+            return False
+
+    def take_pending(self, queue_name: str) -> list[ServiceBusMessage]:
+        """Detach the pending messages (and scheduled flush) for a queue."""
+        handle = self.flush_handles.pop(queue_name, None)
+        if handle is not None:
+            handle.cancel()
+        return self.pending.pop(queue_name, [])
+
+    def enqueue(self, queue_name: str, message: ServiceBusMessage) -> None:
+        """Add a message to the queue's pending batch, scheduling a flush if needed."""
+        self.pending.setdefault(queue_name, []).append(message)
+        if queue_name not in self.flush_handles:
+            self.flush_handles[queue_name] = asyncio.get_running_loop().call_later(
+                SB_BATCH_INTERVAL_MS / 1000, self._start_flush, queue_name
+            )
+
+    def _start_flush(self, queue_name: str) -> None:
+        task = asyncio.get_running_loop().create_task(self.flush(queue_name))
+        self.flush_tasks.add(task)
+        task.add_done_callback(self.flush_tasks.discard)
+
+    async def flush(self, queue_name: str) -> None:
+        """
+        Send everything pending for a queue in as few size-limited message
+        batches as possible. A message too large for any batch is logged and
+        skipped (queue_message rejects these up front).
+        """
+        messages = self.take_pending(queue_name)
+        if not messages:
+            return
+
+        sent = dropped = 0
+        try:
+            sender = self.get_sender(queue_name)
+            batch = await sender.create_message_batch()
+
+            for message in messages:
+                try:
+                    batch.add_message(message)
+                    continue
+                except MessageSizeExceededError:
+                    if len(batch) == 0:
+                        dropped += 1
+                        logger.error("Message exceeds the batch size limit for '%s', dropped", queue_name)
+                        continue
+
+                await sender.send_messages(batch)
+                sent += len(batch)
+                batch = await sender.create_message_batch()
+                try:
+                    batch.add_message(message)
+                except MessageSizeExceededError:
+                    dropped += 1
+                    logger.error("Message exceeds the batch size limit for '%s', dropped", queue_name)
+
+            if len(batch) > 0:
+                await sender.send_messages(batch)
+                sent += len(batch)
+
+            logger.info("Flushed %s of %s message(s) to '%s' (%s dropped)", sent, len(messages), queue_name, dropped)
+        except Exception as e:
+            logger.exception(
+                "Failed to flush to '%s': %s of %s message(s) sent, %s dropped, %s lost: %s",
+                queue_name, sent, len(messages), dropped, len(messages) - sent - dropped, e
+            )
+
+    async def close(self) -> None:
+        """Flush pending messages and close senders and the client."""
+        for queue_name in list(self.pending):
+            await self.flush(queue_name)
+
+        for sender in self.senders.values():
+            try:
+                await sender.close()
+            except Exception:
+                pass
+        self.senders.clear()
+
+        if self.client is not None:
+            try:
+                await self.client.close()
+            except Exception:
+                pass
+            self.client = None
+
+
+# Target queues this worker has tried to ensure, successfully or not. A failed
+# check (e.g. a Send-only SAS without the Manage claim) is not retried, so
+# sends never pay for repeated management-plane calls.
+_ensured_queues: set[str] = set()
+
+
+async def _ensure_queue(queue_name: str) -> None:
+    """Ensure a target queue exists on its first use in this worker (one attempt)."""
+    if queue_name in _ensured_queues:
+        return
+
+    _ensured_queues.add(queue_name)
+    if not await asyncio.to_thread(ensure_queue_exists, queue_name):
+        logger.warning("Could not verify queue '%s', sending anyway", queue_name)
+
+
+# aio clients must not be shared across event loops; state dies with its loop
+_loop_senders: WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopSender] = WeakKeyDictionary()
+_loop_senders_lock = threading.Lock()
+
+
+def _get_loop_sender() -> _LoopSender:
+    loop = asyncio.get_running_loop()
+    state = _loop_senders.get(loop)
+    if state is None:
+        with _loop_senders_lock:
+            state = _loop_senders.get(loop)
+            if state is None:
+                state = _LoopSender()
+                _loop_senders[loop] = state
+    return state
+
+
+def _close_sb() -> None:
+    """Flush and close per-loop clients whose loops can still run at shutdown."""
+    for loop, state in list(_loop_senders.items()):
+        if loop.is_closed() or loop.is_running():
+            continue
+        try:
+            loop.run_until_complete(state.close())
+        except Exception as e:
+            logger.warning("Failed to close Service Bus client: %s", e)
+
+
+atexit.register(_close_sb)
+
 
 @bp.activity_trigger(input_name="queueInput")
-def queue_message(queueInput: dict) -> dict:
+async def queue_message(queueInput: dict) -> dict:
     """
     Generic activity to send a message to any Service Bus queue.
 
     Input:
     - queue: Target queue name
     - payload: Message body (dict)
+    - flush_now: Send immediately, after anything pending (optional)
     """
     queue_name = queueInput.get("queue")
     payload = queueInput.get("payload", {})
+    flush_now = queueInput.get("flush_now", False)
 
     if not queue_name:
         return {"status": "error", "reason": "No queue name provided"}
 
     if not SERVICE_BUS_CONNECTION_STRING:
-        logging.error("SERVICE_BUS_CONNECTION_STRING not configured")
+        logger.error("SERVICE_BUS_CONNECTION_STRING not configured")
         return {"status": "error", "reason": "Service Bus not configured"}
 
-    max_retries = 3
-    retry_delays = [2, 5, 10]
+    try:
+        sb_message = ServiceBusMessage(
+            body=orjson.dumps(payload),
+            content_type="application/json"
+        )
+        await _ensure_queue(queue_name)
+        sender = _get_loop_sender()
 
-    for attempt in range(max_retries):
-        try:
-            with ServiceBusClient.from_connection_string(SERVICE_BUS_CONNECTION_STRING) as client:
-                with client.get_queue_sender(queue_name) as sender:
-                    sb_message = ServiceBusMessage(
-                        body=json.dumps(payload),
-                        content_type="application/json"
-                    )
-                    sender.send_messages(sb_message)
-                    logging.info(f"Queued message to '{queue_name}' (attempt {attempt + 1})")
-                    return {"status": "success", "queue": queue_name, "attempts": attempt + 1}
-        except Exception as e:
-            is_last_attempt = (attempt == max_retries - 1)
-            if is_last_attempt:
-                logging.exception(f"Failed to queue message to '{queue_name}' after {max_retries} attempts: {e}")
-                return {"status": "error", "reason": str(e), "attempts": max_retries}
-            else:
-                delay = retry_delays[attempt]
-                logging.warning(f"Queue attempt {attempt + 1} failed, retrying in {delay}s: {e}")
-                time.sleep(delay)
+        # Reject oversized messages here, so they can't sink a shared batch later
+        if not await sender.fits(queue_name, sb_message):
+            logger.error("Message for '%s' exceeds the Service Bus batch size limit", queue_name)
+            return {"status": "error", "reason": "Message exceeds the Service Bus size limit"}
+
+        if SB_BATCH_INTERVAL_MS > 0 and not flush_now:
+            sender.enqueue(queue_name, sb_message)
+            return {"status": "success", "queue": queue_name, "batched": True}
+
+        # Pending messages go first (ordering), but their failures stay in the
+        # flush log; only this caller's own send decides its result
+        await sender.flush(queue_name)
+        await sender.get_sender(queue_name).send_messages(sb_message)
+        logger.info("Queued message to '%s'", queue_name)
+        return {"status": "success", "queue": queue_name}
+    except Exception as e:
+        logger.exception("Failed to queue message to '%s': %s", queue_name, e)
+        return {"status": "error", "reason": str(e)}
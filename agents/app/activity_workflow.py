@@ -7,15 +7,40 @@ Single activity that can run any agent type with consistent:
 - Output with routing (AgentResponse with next_action)
 """
 
-import json
 import logging
-from dataclasses import asdict
-from datetime import datetime
+import os
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from types import FrameType
+
+import msgspec
+import orjson
 
 from agents.agents import bp
 from agents.utility.util_classes import AgentResponse, AgentWorkflowInput, NextAction
 from agents.utility.util_agents import get_backend
 
+logger = logging.getLogger(__name__)
+
+_INSTRUCTIONS_DIR = Path(__file__).parent.parent / "instructions"
+
+
+class _RouteAction(msgspec.Struct):
+    """Typed schema for an agent's next_action."""
+    target_queue: str | None = None
+    payload: dict | None = None
+
+
+class _RouteEnvelope(msgspec.Struct):
+    """Typed schema for the routing part of an agent response."""
+    next_action: _RouteAction | None = None
+
+
+_ROUTE_DECODER = msgspec.json.Decoder(_RouteEnvelope)
+
 
 @bp.activity_trigger(input_name="workflowInput")
 def run_agent_workflow(workflowInput: dict) -> dict:
@@ -29,14 +54,14 @@ def run_agent_workflow(workflowInput: dict) -> dict:
     Output: dict representation of AgentResponse
     """
     input_data = AgentWorkflowInput(
-        agent_type=workflowInput.get("agent_type"),
+        agent_type=workflowInput.get("agent_type") or "unknown",
         payload=workflowInput.get("payload", {})
     )
 
     agent_type = input_data.agent_type
-    logging.info(f"Running agent workflow: {agent_type}")
+    logger.info("Running agent workflow: %s", agent_type)
 
-    started_at = datetime.utcnow()
+    started_ns = time.perf_counter_ns()
 
     try:
         # Load system prompt
@@ -46,7 +71,7 @@ def run_agent_workflow(workflowInput: dict) -> dict:
         backend = get_backend()
 
         # Execute agent
-        messages = [{"role": "user", "content": json.dumps(input_data.payload)}]
+        messages = [{"role": "user", "content": orjson.dumps(input_data.payload).decode()}]
         agent_response = backend.execute(
             system_prompt=system_prompt,
             messages=messages,
@@ -54,93 +79,111 @@ def run_agent_workflow(workflowInput: dict) -> dict:
         )
 
         if not agent_response:
-            logging.error(f"No response from agent: {agent_type}")
-            return asdict(AgentResponse(
+            logger.error("No response from agent: %s", agent_type)
+            return AgentResponse(
                 status="error",
                 responses=[],
                 reason=f"No response from agent: {agent_type}",
                 agent_type=agent_type
-            ))
+            ).to_dict()
 
         # Enrich response with workflow metadata
         agent_response.agent_type = agent_type
         agent_response.next_action = _determine_next_action(agent_type, agent_response)
 
         # Track token usage
-        _track_usage(agent_response, agent_type, started_at)
-
-        logging.info(
-            f"Agent workflow completed: {agent_type} | status={agent_response.status} | "
-            f"responses={len(agent_response.responses)} | "
-            f"next={agent_response.next_action.target_queue if agent_response.next_action else 'none'}"
+        _track_usage(agent_response, agent_type, started_ns)
+
+        logger.info(
+            "Agent workflow completed: %s | status=%s | responses=%s | next=%s",
+            agent_type,
+            agent_response.status,
+            len(agent_response.responses),
+            agent_response.next_action.target_queue if agent_response.next_action else "none",
         )
 
-        return asdict(agent_response)
+        return agent_response.to_dict()
 
     except Exception as e:
-        logging.exception(f"Agent workflow failed: {agent_type}")
-        return asdict(AgentResponse(
+        logger.exception("Agent workflow failed: %s", agent_type)
+        return AgentResponse(
             status="error",
             responses=[],
             reason=str(e),
             agent_type=agent_type
-        ))
+        ).to_dict()
 
 
+@lru_cache(maxsize=64)
 def _load_system_prompt(agent_type: str) -> str:
-    """Load system prompt from instructions directory."""
-    from pathlib import Path
-
-    instructions_dir = Path(__file__).parent.parent / "instructions"
-    prompt_file = instructions_dir / f"{agent_type}.system.md"
+    """Load system prompt from instructions directory (cached per agent_type)."""
+    prompt_file = _INSTRUCTIONS_DIR / f"{agent_type}.system.md"
 
     if prompt_file.exists():
         return prompt_file.read_text(encoding="utf-8")
 
-    logging.warning(f"No system prompt found for agent: {agent_type}")
+    logger.warning("No system prompt found for agent: %s", agent_type)
     return f"You are a {agent_type} agent. Process the input and return a JSON response."
 
 
+def _reload_system_prompts(signum: int, frame: FrameType | None) -> None:
+    """Signal handler: drop cached system prompts so edits are picked up."""
+    _load_system_prompt.cache_clear()
+    logger.info("System prompt cache cleared")
+
+
+# AGENT_PROMPT_RELOAD=1 lets ops reload prompts with SIGHUP without a restart
+if os.environ.get("AGENT_PROMPT_RELOAD") == "1" and hasattr(signal, "SIGHUP"):
+    try:
+        signal.signal(signal.SIGHUP, _reload_system_prompts)
+    except ValueError:
+        logger.warning("AGENT_PROMPT_RELOAD ignored: not running in the main thread")
+
+
 def _determine_next_action(agent_type: str, response: AgentResponse) -> NextAction | None:
     """Extract routing decision from agent response."""
-    first_response = response.responses[0] if response.responses else {}
+    first_response = response.responses[0] if response.responses else None
 
     if isinstance(first_response, dict) and 'raw' in first_response:
         first_response = first_response['raw']
 
-    if isinstance(first_response, str):
-        try:
-            first_response = json.loads(first_response)
-        except json.JSONDecodeError:
-            logging.warning(f"Agent {agent_type} returned non-JSON response")
+    try:
+        if isinstance(first_response, (str, bytes)):
+            envelope = _ROUTE_DECODER.decode(first_response)
+        elif isinstance(first_response, dict):
+            envelope = msgspec.convert(first_response, _RouteEnvelope)
+        else:
             return None
-
-    agent_next_action = first_response.get("next_action") if isinstance(first_response, dict) else None
-
-    if not agent_next_action or not isinstance(agent_next_action, dict):
+    except msgspec.ValidationError as e:
+        logger.warning("Agent %s returned invalid routing data: %s", agent_type, e)
+        return None
+    except msgspec.DecodeError:
+        logger.warning("Agent %s returned non-JSON response", agent_type)
         return None
 
-    target_queue = agent_next_action.get("target_queue")
-    if not target_queue or target_queue == "none":
+    action = envelope.next_action
+    if action is None or action.target_queue in (None, "", "none"):
         return None
 
-    payload = agent_next_action.get("payload", {})
-    logging.info(f"Agent {agent_type} routing to: {target_queue}")
-    return NextAction(target_queue=target_queue, payload=payload)
+    logger.info("Agent %s routing to: %s", agent_type, action.target_queue)
+    return NextAction(target_queue=action.target_queue, payload=action.payload or {})
 
 
-def _track_usage(response: AgentResponse, agent_type: str, started_at: datetime) -> None:
+def _track_usage(response: AgentResponse, agent_type: str, started_ns: int) -> None:
     """Track token usage (fail-safe)."""
     try:
         if response.usage:
             from shared.util_token_tracking import track_token_usage
+            elapsed_ms = (time.perf_counter_ns() - started_ns) // 1_000_000
+            completed_at = datetime.now(timezone.utc)
             track_token_usage(
                 model_name=response.model_name or "unknown",
                 input_tokens=response.usage.prompt_tokens,
                 output_tokens=response.usage.completion_tokens,
                 agent_type=agent_type,
-                started_at=started_at,
+                started_at=completed_at - timedelta(milliseconds=elapsed_ms),
+                completed_at=completed_at,
                 inference_rounds=response.inference_rounds,
             )
     except Exception as e:
-        logging.warning(f"Failed to track token usage: {e}")
+        logger.warning("Failed to track token usage: %s", e)
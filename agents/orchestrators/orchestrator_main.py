@@ -13,6 +13,8 @@ import logging
 
 from agents.agents import bp
 
+logger = logging.getLogger(__name__)
+
 
 @bp.orchestration_trigger(context_name="context")
 def main_orchestrator(context):
@@ -24,7 +26,7 @@ def main_orchestrator(context):
     input_data = context.get_input()
     event_type = input_data.get("event_type", "unknown")
 
-    logging.info(f"Main orchestrator started: event_type={event_type}")
+    logger.info("Main orchestrator started: event_type=%s", event_type)
 
     # Step 1: Triage - determine which agent should handle this
     triage_result = yield context.call_activity(
@@ -36,7 +38,7 @@ def main_orchestrator(context):
     )
 
     if triage_result.get("status") == "error":
-        logging.error(f"Triage failed: {triage_result.get('reason')}")
+        logger.error("Triage failed: %s", triage_result.get('reason'))
         return {"status": "error", "reason": triage_result.get("reason")}
 
     # Step 2: Check for next_action routing
@@ -50,7 +52,7 @@ def main_orchestrator(context):
                 "queue_message",
                 {"queue": target_queue, "payload": payload}
             )
-            logging.info(f"Routed to queue: {target_queue}")
+            logger.info("Routed to queue: %s", target_queue)
 
     return {
         "status": "completed",
@@ -5,9 +5,11 @@ Supports multiple backends via the AIBackend protocol:
 - AzureOpenAIBackend: Azure OpenAI Service (default)
 - Add more backends as needed (e.g., Azure AI Agents, local models)
 
-Selected via AI_BACKEND environment variable.
+Selected via AI_BACKEND environment variable. The backend is built at
+import time so a warm worker pays HTTP/TLS setup once, not on first call.
 """
 
+import atexit
 import json
 import logging
 import os
@@ -15,6 +17,8 @@ from typing import Protocol, runtime_checkable
 
 from agents.utility.util_classes import AgentResponse, TokenUsage
 
+logger = logging.getLogger(__name__)
+
 
 @runtime_checkable
 class AIBackend(Protocol):
@@ -29,15 +33,36 @@ class AzureOpenAIBackend:
     """Azure OpenAI Service backend."""
 
     def __init__(self):
+        import httpx
         from openai import AzureOpenAI
 
-        self.client = AzureOpenAI(
-            azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT", ""),
-            api_key=os.environ.get("AZURE_OPENAI_API_KEY", ""),
-            api_version=os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
+        # Pooled client shared by all requests from this worker; HTTP/2
+        # multiplexes concurrent completions over one TLS connection and the
+        # transport retries failed connection attempts
+        self.http_client = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0),
         )
+        try:
+            self.client = AzureOpenAI(
+                azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT", ""),
+                api_key=os.environ.get("AZURE_OPENAI_API_KEY", ""),
+                api_version=os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
+                http_client=self.http_client,
+            )
+        except Exception:
+            self.http_client.close()
+            raise
         self.deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
 
+    def close(self) -> None:
+        """Close pooled HTTP connections."""
+        self.http_client.close()
+
     def execute(self, system_prompt: str, messages: list, tools: list) -> AgentResponse:
         """Execute agent via Azure OpenAI chat completion."""
         full_messages = [{"role": "system", "content": system_prompt}] + messages
@@ -73,7 +98,7 @@ class AzureOpenAIBackend:
             )
 
         except Exception as e:
-            logging.exception(f"Azure OpenAI execution failed: {e}")
+            logger.exception("Azure OpenAI execution failed: %s", e)
             return AgentResponse(
                 status="error",
                 responses=[],
@@ -110,8 +135,32 @@ def get_backend() -> AIBackend:
     elif backend_type == "azure_ai_agents":
         _backend_instance = AzureAIAgentsBackend()
     else:
-        logging.warning(f"Unknown AI_BACKEND '{backend_type}', defaulting to azure_openai")
+        logger.warning("Unknown AI_BACKEND '%s', defaulting to azure_openai", backend_type)
         _backend_instance = AzureOpenAIBackend()
 
-    logging.info(f"AI backend initialized: {backend_type}")
+    logger.info("AI backend initialized: %s", backend_type)
     return _backend_instance
+
+
+def close() -> None:
+    """Release the backend's pooled connections (registered with atexit)."""
+    global _backend_instance
+    if _backend_instance is None:
+        return
+
+    close_fn = getattr(_backend_instance, "close", None)
+    if close_fn is not None:
+        try:
+            close_fn()
+        except Exception as e:
+            logger.warning("Failed to close AI backend: %s", e)
+    _backend_instance = None
+
+
+atexit.register(close)
+
+# Build the backend eagerly; on failure get_backend() retries on first use
+try:
+    get_backend()
+except Exception as e:
+    logger.warning("Could not initialize AI backend at startup: %s", e)
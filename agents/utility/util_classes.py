@@ -6,28 +6,38 @@ from dataclasses import dataclass, field
 from typing import Any, Callable
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TokenUsage:
     prompt_tokens: int
     completion_tokens: int
     total_tokens: int
 
+    def to_dict(self) -> dict:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+        }
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class NextAction:
     """What the orchestrator should queue next."""
     target_queue: str    # "agent-tasks" | "agent-results" | "none"
     payload: dict        # Message body for the queue
 
+    def to_dict(self) -> dict:
+        return {"target_queue": self.target_queue, "payload": self.payload}
+
 
-@dataclass
+@dataclass(slots=True)
 class AgentWorkflowInput:
     """Standardized input for the workflow activity."""
     agent_type: str      # "triage", etc.
     payload: dict        # All agent input data
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResponse:
     """Agent execution result + workflow routing."""
     status: str
@@ -41,6 +51,21 @@ class AgentResponse:
     model_name: str | None = None
     next_action: NextAction | None = None
 
+    def to_dict(self) -> dict:
+        """Flat dict for activity output (no deepcopy, unlike dataclasses.asdict)."""
+        return {
+            "status": self.status,
+            "responses": self.responses,
+            "thread_id": self.thread_id,
+            "reason": self.reason,
+            "usage": self.usage.to_dict() if self.usage else None,
+            "tool_calls": self.tool_calls,
+            "inference_rounds": self.inference_rounds,
+            "agent_type": self.agent_type,
+            "model_name": self.model_name,
+            "next_action": self.next_action.to_dict() if self.next_action else None,
+        }
+
     @classmethod
     def from_dict(cls, data: dict) -> 'AgentResponse':
         """Convert dict back to AgentResponse object."""
@@ -58,7 +83,7 @@ class AgentResponse:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class LoadedTools:
     """Tool definitions and executors for an agent."""
     definitions: list[dict] = field(default_factory=list)
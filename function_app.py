@@ -16,11 +16,12 @@ Main Function App entry point that registers all blueprints:
    HTTP endpoints that agents can call to perform actions
 """
 
-import json
 import logging
 import azure.functions as func
 import azure.durable_functions as df
 
+from shared import json_response
+
 # Import blueprints from each layer
 from webhooks.webhooks import bp as webhooks_bp
 from agents.agents import bp as agents_bp
@@ -49,11 +50,8 @@ app.register_functions(tools_bp)
 @app.route(route="health", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
 def health_check(req: func.HttpRequest) -> func.HttpResponse:
     """Root health check endpoint."""
-    return func.HttpResponse(
-        json.dumps({
-            "status": "healthy",
-            "app": "agent-agcloud",
-            "layers": ["webhooks", "agents", "tools"]
-        }),
-        mimetype="application/json"
-    )
+    return json_response({
+        "status": "healthy",
+        "app": "agent-agcloud",
+        "layers": ["webhooks", "agents", "tools"]
+    })
@@ -3,18 +3,42 @@ Cosmos DB client for event and execution logs.
 
 Container: agent-events
 Used for execution traces, token usage fallback, and audit logs.
+
+log_event writes synchronously; log_event_async buffers events and a
+background thread flushes them as per-partition transactional batches,
+retrying a failed batch one event at a time.
 """
 
+import atexit
 import logging
+import queue
+import threading
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from shared.util_config import get_config
 
+if TYPE_CHECKING:
+    from azure.cosmos import ContainerProxy
+
 
 _client = None
 _database = None
+_containers: dict[str, "ContainerProxy"] = {}
+_containers_lock = threading.Lock()
+
+# Buffered (async) event writes
+EVENT_BUFFER_SIZE = 10_000
+EVENT_FLUSH_INTERVAL_SECONDS = 0.25
+EVENT_FLUSH_THRESHOLD = 100
+MAX_BATCH_OPERATIONS = 100  # Cosmos transactional batch limit
+
+_event_buffer: "queue.Queue[tuple[str, dict]]" = queue.Queue(maxsize=EVENT_BUFFER_SIZE)
+_flush_wakeup = threading.Event()
+_flush_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
 
 
 def _get_database():
@@ -37,6 +61,32 @@ def _get_database():
         return None
 
 
+def _get_container(container_name: str) -> Optional["ContainerProxy"]:
+    """Get a cached container proxy (None if Cosmos is not configured)."""
+    container = _containers.get(container_name)
+    if container is not None:
+        return container
+
+    db = _get_database()
+    if db is None:
+        return None
+
+    with _containers_lock:
+        container = _containers.get(container_name)
+        if container is None:
+            container = db.get_container_client(container_name)
+            _containers[container_name] = container
+        return container
+
+
+def _prepare_event(event: dict, partition_key: Optional[str] = None) -> dict:
+    """Add id, timestamp and partition key metadata to an event (in place)."""
+    event["id"] = event.get("id") or str(uuid.uuid4())
+    event["timestamp"] = event.get("timestamp") or datetime.utcnow().isoformat()
+    event["_partition_key"] = partition_key or event.get("event_type", "default")
+    return event
+
+
 def log_event(container_name: str, event: dict, partition_key: Optional[str] = None) -> dict:
     """
     Write an event document to Cosmos DB.
@@ -49,18 +99,12 @@ def log_event(container_name: str, event: dict, partition_key: Optional[str] = N
     Returns:
         {"success": bool, "id": str or None, "error": str or None}
     """
-    db = _get_database()
-    if db is None:
+    container = _get_container(container_name)
+    if container is None:
         return {"success": False, "error": "Cosmos DB not configured"}
 
     try:
-        container = db.get_container_client(container_name)
-
-        # Add metadata
-        event["id"] = event.get("id") or str(uuid.uuid4())
-        event["timestamp"] = event.get("timestamp") or datetime.utcnow().isoformat()
-        event["_partition_key"] = partition_key or event.get("event_type", "default")
-
+        _prepare_event(event, partition_key)
         container.upsert_item(event)
         return {"success": True, "id": event["id"]}
 
@@ -69,6 +113,104 @@ def log_event(container_name: str, event: dict, partition_key: Optional[str] = N
         return {"success": False, "error": str(e)}
 
 
+def log_event_async(container_name: str, event: dict, partition_key: Optional[str] = None) -> dict:
+    """
+    Buffer an event for a background batch write to Cosmos DB.
+
+    Returns immediately; write failures are logged by the flusher.
+    Falls back to a synchronous write if the buffer is full.
+
+    Returns:
+        {"success": bool, "id": str, "queued": bool}
+    """
+    _prepare_event(event, partition_key)
+    _ensure_flusher()
+
+    try:
+        _event_buffer.put_nowait((container_name, event))
+    except queue.Full:
+        logging.warning("Cosmos event buffer full - writing synchronously")
+        return {**log_event(container_name, event, partition_key), "queued": False}
+
+    if _event_buffer.qsize() >= EVENT_FLUSH_THRESHOLD:
+        _flush_wakeup.set()
+    return {"success": True, "id": event["id"], "queued": True}
+
+
+def flush_events() -> None:
+    """Write all buffered events, one transactional batch per partition key."""
+    with _flush_lock:
+        drained: list[tuple[str, dict]] = []
+        while True:
+            try:
+                drained.append(_event_buffer.get_nowait())
+            except queue.Empty:
+                break
+
+        if not drained:
+            return
+
+        groups: dict[tuple[str, str], list[dict]] = {}
+        for container_name, event in drained:
+            groups.setdefault((container_name, event["_partition_key"]), []).append(event)
+
+        for (container_name, partition_key), events in groups.items():
+            container = _get_container(container_name)
+            if container is None:
+                logging.warning(f"Dropping {len(events)} buffered event(s): Cosmos DB not configured")
+                continue
+
+            for start in range(0, len(events), MAX_BATCH_OPERATIONS):
+                chunk = events[start:start + MAX_BATCH_OPERATIONS]
+                try:
+                    container.execute_item_batch(
+                        [("upsert", (event,)) for event in chunk],
+                        partition_key=partition_key,
+                    )
+                except Exception as e:
+                    # Batches are all-or-nothing; retry individually so one bad
+                    # document (or a non-matching partition key path) loses only itself
+                    logging.warning(
+                        f"Batch write of {len(chunk)} event(s) to Cosmos container "
+                        f"'{container_name}' failed, retrying individually: {e}"
+                    )
+                    _upsert_each(container, container_name, chunk)
+
+
+def _upsert_each(container: "ContainerProxy", container_name: str, events: list[dict]) -> None:
+    """Write events one by one with upsert_item, logging each failure."""
+    for event in events:
+        try:
+            container.upsert_item(event)
+        except Exception as e:
+            logging.warning(f"Failed to log event {event['id']} to Cosmos container '{container_name}': {e}")
+
+
+def _flush_loop() -> None:
+    while True:
+        _flush_wakeup.wait(EVENT_FLUSH_INTERVAL_SECONDS)
+        _flush_wakeup.clear()
+        try:
+            flush_events()
+        except Exception as e:
+            logging.warning(f"Cosmos event flush failed: {e}")
+
+
+def _ensure_flusher() -> None:
+    """Start the background flush thread on first use."""
+    global _flusher
+    if _flusher is not None:
+        return
+
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="cosmos-event-flusher", daemon=True)
+            _flusher.start()
+
+
+atexit.register(flush_events)
+
+
 def query_events(container_name: str, query: str, parameters: list = None) -> dict:
     """
     Query events from Cosmos DB.
@@ -81,12 +223,11 @@ def query_events(container_name: str, query: str, parameters: list = None) -> di
     Returns:
         {"success": bool, "items": list, "error": str or None}
     """
-    db = _get_database()
-    if db is None:
+    container = _get_container(container_name)
+    if container is None:
         return {"success": False, "items": [], "error": "Cosmos DB not configured"}
 
     try:
-        container = db.get_container_client(container_name)
         items = list(container.query_items(
             query=query,
             parameters=parameters or [],
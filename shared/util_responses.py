@@ -2,14 +2,29 @@
 Shared HTTP response utilities.
 """
 
-import json
+from typing import Any
+
+import orjson
 import azure.functions as func
 
+_JSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _json_default(value: Any) -> str:
+    """Fallback for types orjson does not serialize natively."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
 
 def json_response(data: dict, status_code: int = 200) -> func.HttpResponse:
-    """Helper for JSON responses."""
+    """
+    Helper for JSON responses (orjson bytes are passed through as the body).
+    datetimes are serialized natively as ISO 8601 (UTC as "Z"); non-str
+    dict keys are stringified, as json.dumps does.
+    """
     return func.HttpResponse(
-        json.dumps(data),
+        orjson.dumps(data, default=_json_default, option=_JSON_OPTIONS),
         status_code=status_code,
         mimetype="application/json"
     )
@@ -3,26 +3,135 @@ Token tracking utility for LLM usage analytics.
 
 Provides fail-safe token usage tracking via SQL Server,
 with Cosmos DB fallback for event logging.
+
+Records are buffered in-process and bulk-inserted in one transaction
+when TOKEN_USAGE_MAX_BATCH rows are waiting or TOKEN_USAGE_MAX_DELAY
+seconds have passed; a failed flush falls back to Cosmos DB. Flushes run
+on a small background pool, so callers never wait on the database.
 """
 
-import json
+import atexit
 import logging
-from datetime import datetime
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+# Resolved once at import; None when the database layer is unavailable
+try:
+    from sqlalchemy import insert
+    from tools.utility.util_database import engine as _engine
+    from tools.utility.util_database import ensure_table as _ensure_table
+    from tools.utility.util_datamodel import LLMTokenUsage as _LLMTokenUsage
+
+    # Built once so SQLAlchemy's compiled cache (and the driver's prepared
+    # statement) are reused by every flush
+    _INSERT_STMT = insert(_LLMTokenUsage.__table__)
+except ImportError as e:
+    logger.warning("Token usage SQL storage unavailable: %s", e)
+    _engine = _ensure_table = _LLMTokenUsage = _INSERT_STMT = None
+
+_UTC = timezone.utc
+
+# Description column is NVARCHAR(500); longer values are cut with an ellipsis
+DESCRIPTION_MAX_LENGTH = 500
+_ELLIPSIS = "..."
+_DESCRIPTION_CUT = DESCRIPTION_MAX_LENGTH - len(_ELLIPSIS)
+
+TOKEN_USAGE_MAX_BATCH = 100
+TOKEN_USAGE_MAX_DELAY = 2.0
+
+# Runs buffer flushes off the calling (inference) thread
+_tracking_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="token-tracker")
+
+
+class _TokenUsageBuffer:
+    """Thread-safe buffer of token usage rows, flushed as one bulk insert."""
+
+    def __init__(self, max_batch_size: int, max_delay: float):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._rows: deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, row: dict) -> None:
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.max_batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self._schedule_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        try:
+            _tracking_pool.submit(self.flush)
+        except RuntimeError:
+            # Pool already shut down (interpreter exit): flush on this thread
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            rows = list(self._rows)
+            self._rows.clear()
+
+        if not rows:
+            return
+
+        try:
+            _insert_rows(rows)
+            logger.debug("Token usage flushed: %s record(s)", len(rows))
+        except Exception as e:
+            logger.warning("Failed to flush %s token usage record(s): %s", len(rows), e)
+            for row in rows:
+                try:
+                    _fallback_to_cosmos(**row, error=str(e))
+                except Exception as fallback_error:
+                    logger.warning("Cosmos fallback also failed: %s", fallback_error)
+
+
+def _insert_rows(rows: list[dict]) -> None:
+    """
+    Bulk insert token usage rows in a single transaction, as one executemany
+    of the precompiled INSERT (no RETURNING; ids aren't needed).
+    """
+    if _engine is None or _INSERT_STMT is None:
+        raise RuntimeError("Token usage SQL storage unavailable")
+
+    columns = _LLMTokenUsage.__mapper__.columns
+    params = [{columns[attr].key: value for attr, value in row.items()} for row in rows]
+    with _engine.begin() as conn:
+        conn.execute(_INSERT_STMT, params)
+
+
+_buffer = _TokenUsageBuffer(TOKEN_USAGE_MAX_BATCH, TOKEN_USAGE_MAX_DELAY)
+atexit.register(_buffer.flush)
+
 
 def ensure_token_usage_table() -> None:
     """
     Ensure the LLMTokenUsage table exists in the database.
     Called on application startup.
     """
+    if _ensure_table is None or _LLMTokenUsage is None:
+        logger.warning("Could not ensure LLMTokenUsage table: SQL storage unavailable")
+        return
+
     try:
-        from tools.utility.util_datamodel import LLMTokenUsage
-        from tools.utility.util_database import ensure_table
-        ensure_table(LLMTokenUsage)
-        logging.info("LLMTokenUsage table verified/created")
+        _ensure_table(_LLMTokenUsage)
+        logger.info("LLMTokenUsage table verified/created")
     except Exception as e:
-        logging.warning(f"Could not ensure LLMTokenUsage table: {e}")
+        logger.warning("Could not ensure LLMTokenUsage table: %s", e)
 
 
 def track_token_usage(
@@ -40,8 +149,16 @@ def track_token_usage(
     Track LLM token usage for analytics.
 
     Fail-safe: errors are logged but never propagated.
-    Falls back to Cosmos DB if SQL write fails.
+    The record is buffered for a bulk insert; rows that fail to flush
+    fall back to Cosmos DB.
     """
+    if started_at is None:
+        return {"success": False, "error": "started_at is required"}
+
+    # Timestamps are non-None from here on, including the fallback paths
+    if completed_at is None:
+        completed_at = datetime.now(_UTC)
+
     try:
         if not model_name or not agent_type:
             return {"success": False, "error": "model_name and agent_type are required"}
@@ -49,53 +166,37 @@ def track_token_usage(
         if input_tokens < 0 or output_tokens < 0:
             return {"success": False, "error": "Token counts cannot be negative"}
 
-        if completed_at is None:
-            completed_at = datetime.utcnow()
-
-        if description and len(description) > 500:
-            description = description[:497] + "..."
-
-        from tools.utility.util_database import SessionLocal
-        from tools.utility.util_datamodel import LLMTokenUsage
+        if description is not None and len(description) > DESCRIPTION_MAX_LENGTH:
+            description = description[:_DESCRIPTION_CUT] + _ELLIPSIS
 
-        if SessionLocal is None:
+        if _engine is None:
             return _fallback_to_cosmos(
                 model_name, input_tokens, output_tokens, agent_type,
                 started_at, agent_operation, inference_rounds, description, completed_at
             )
 
-        session = SessionLocal()
-        try:
-            record = LLMTokenUsage(
-                agent_type=agent_type,
-                agent_operation=agent_operation,
-                model_name=model_name,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                inference_rounds=inference_rounds or 0,
-                description=description,
-                started_at=started_at,
-                completed_at=completed_at
-            )
-            session.add(record)
-            session.commit()
-            record_id = record.id
-            session.close()
-
-            logging.debug(
-                f"Token usage tracked: agent={agent_type}, model={model_name}, "
-                f"tokens={input_tokens + output_tokens}, id={record_id}"
+        _buffer.add({
+            "agent_type": agent_type,
+            "agent_operation": agent_operation,
+            "model_name": model_name,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "inference_rounds": inference_rounds or 0,
+            "description": description,
+            "started_at": started_at,
+            "completed_at": completed_at,
+        })
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Token usage queued: agent=%s, model=%s, tokens=%d",
+                agent_type, model_name, input_tokens + output_tokens
             )
-            return {"success": True, "id": record_id}
-
-        except Exception as e:
-            session.rollback()
-            session.close()
-            raise e
+        return {"success": True, "queued": True}
 
     except Exception as e:
         error_msg = f"Failed to track token usage: {e}"
-        logging.warning(error_msg)
+        logger.warning(error_msg)
 
         # Fallback to Cosmos DB
         try:
@@ -105,7 +206,7 @@ def track_token_usage(
                 completed_at, error=str(e)
             )
         except Exception as fallback_error:
-            logging.warning(f"Cosmos fallback also failed: {fallback_error}")
+            logger.warning("Cosmos fallback also failed: %s", fallback_error)
 
         return {"success": False, "error": error_msg}
 
@@ -115,7 +216,10 @@ def _fallback_to_cosmos(
     started_at, agent_operation=None, inference_rounds=None,
     description=None, completed_at=None, error=None
 ) -> dict:
-    """Fallback: write token usage to Cosmos DB event log."""
+    """
+    Fallback: write token usage to Cosmos DB event log.
+    Callers pass non-None started_at/completed_at (see track_token_usage).
+    """
     try:
         from shared.util_cosmos import log_event
         event = {
@@ -127,8 +231,8 @@ def _fallback_to_cosmos(
             "output_tokens": output_tokens,
             "inference_rounds": inference_rounds,
             "description": description,
-            "started_at": started_at.isoformat() if started_at else None,
-            "completed_at": completed_at.isoformat() if completed_at else None,
+            "started_at": started_at.isoformat(),
+            "completed_at": completed_at.isoformat(),
             "sql_error": error,
         }
         result = log_event("token-usage", event)
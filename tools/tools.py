@@ -10,6 +10,10 @@ Route pattern: /api/tools/{resource_type}
 import azure.functions as func
 import azure.durable_functions as df
 import logging
+import orjson
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional
 
 from shared import json_response
 
@@ -20,15 +24,34 @@ bp = df.Blueprint()
 # ROUTE CONFIGURATION
 # =============================================================================
 
-ROUTES = {
+@dataclass(slots=True, frozen=True)
+class ResourceRoute:
+    """Handlers for one tools resource type."""
+    handler: Optional[Callable] = None
+    info_handler: Optional[Callable] = None
+    delete_handler: Optional[Callable] = None
+    query_param: str = "id"
+
+
+_RAW_ROUTES = {
     # Add tool routes here:
     # "resource_type": {
     #     "handler": handler_function,
     #     "info_handler": info_function,
     #     "delete_handler": delete_function,
+    #     "query_param": "id",  # optional
     # },
 }
 
+# Frozen at import: one lookup per request, then attribute reads
+ROUTES: Mapping[str, ResourceRoute] = MappingProxyType(
+    {k: ResourceRoute(**v) for k, v in _RAW_ROUTES.items()}
+)
+
+# Durable orchestration status lookups: /api/tools/status/{instance_id}
+STATUS_PREFIX = "status/"
+STATUS_LEN = len(STATUS_PREFIX)
+
 
 # =============================================================================
 # HTTP TRIGGERS
@@ -47,8 +70,8 @@ async def tools_api_handler(req: func.HttpRequest, client: df.DurableOrchestrati
     logging.info(f"Tools API request: GET /tools/{resource_type}")
 
     # Status endpoint for durable orchestrations
-    if resource_type and resource_type.startswith('status/'):
-        instance_id = resource_type.replace('status/', '', 1)
+    if resource_type and resource_type.startswith(STATUS_PREFIX):
+        instance_id = resource_type[STATUS_LEN:]
         status = await client.get_status(instance_id)
 
         if not status:
@@ -58,20 +81,20 @@ async def tools_api_handler(req: func.HttpRequest, client: df.DurableOrchestrati
             "instance_id": instance_id,
             "runtime_status": status.runtime_status.name if status.runtime_status else None,
             "output": status.output,
-            "created_time": status.created_time.isoformat() if status.created_time else None,
-            "last_updated_time": status.last_updated_time.isoformat() if status.last_updated_time else None,
+            "created_time": status.created_time,
+            "last_updated_time": status.last_updated_time,
         })
 
-    config = ROUTES.get(resource_type)
-    if not config:
+    route = ROUTES.get(resource_type)
+    if route is None:
         return json_response({"error": f"Unknown resource type: {resource_type}"}, 404)
 
     # Check for query parameter lookup
-    query_param = config.get("query_param", "id")
+    query_param = route.query_param
     param_value = req.params.get(query_param)
 
     if param_value:
-        handler_fn = config.get("info_handler") or config.get("handler")
+        handler_fn = route.info_handler or route.handler
         if not handler_fn:
             return json_response({"error": f"Info lookup not supported for {resource_type}"}, 400)
         result = handler_fn(param_value)
@@ -90,22 +113,22 @@ async def tools_post_delete_handler(req: func.HttpRequest, client: df.DurableOrc
     logging.info(f"Tools request: {method} /tools/{resource_type}")
 
     try:
-        req_body = req.get_json()
-    except Exception as e:
+        req_body = orjson.loads(req.get_body())
+    except orjson.JSONDecodeError as e:
         return json_response({"error": f"Invalid JSON: {e}"}, 400)
 
-    config = ROUTES.get(resource_type)
-    if not config:
+    route = ROUTES.get(resource_type)
+    if route is None:
         return json_response({"error": f"Unknown resource type: {resource_type}"}, 404)
 
     if method == "DELETE":
-        delete_handler = config.get("delete_handler")
+        delete_handler = route.delete_handler
         if not delete_handler:
             return json_response({"error": f"Delete not supported for {resource_type}"}, 405)
         result = delete_handler(req_body)
         return json_response(result, result.get('status_code', 200))
 
-    handler = config.get("handler")
+    handler = route.handler
     if not handler:
         return json_response({"error": f"POST not supported for {resource_type}"}, 405)
 
@@ -4,16 +4,18 @@ Database session management for SQL Server.
 Provides:
 - SQLAlchemy engine and session factory
 - Context-managed session with auto-commit/rollback
+- Core-level upserts for hot write paths (no Session/ORM state)
 - Generic table management (ensure, upsert, get, delete)
 """
 
 import os
 import logging
 import datetime
+import threading
 from contextlib import contextmanager
 from typing import Generator
 from urllib.parse import quote_plus
-from sqlalchemy import create_engine
+from sqlalchemy import Connection, Table, TextClause, create_engine, insert, select, text, update
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
 
 DB_SERVER = os.getenv("DB_SERVER")
@@ -38,6 +40,13 @@ engine = None
 SessionLocal = None
 Base = declarative_base()
 
+# MERGE statements per (model, upserted attributes)
+_merge_statements: dict[tuple[type, tuple[str, ...]], TextClause] = {}
+
+# Models whose tables have been ensured by this process
+_ensured_tables: set[type] = set()
+_ensured_tables_lock = threading.Lock()
+
 if not missing:
     odbc_str = (
         f"DRIVER={driver};"
@@ -56,6 +65,9 @@ if not missing:
         engine = create_engine(
             SQLALCHEMY_URL,
             pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            pool_recycle=1800,
             fast_executemany=True
         )
         SessionLocal = sessionmaker(
@@ -87,17 +99,113 @@ def get_session() -> Generator[Session, None, None]:
         session.close()
 
 
+def _insert_returning_id(conn: Connection, table: Table, row: dict) -> int:
+    """
+    Insert one row (keyed by column key) and return its identity in the same
+    roundtrip (compiled to INSERT ... OUTPUT INSERTED.Id on SQL Server).
+    """
+    pk_column = next(iter(table.primary_key.columns))
+    return conn.execute(insert(table).returning(pk_column), row).scalar_one()
+
+
 def ensure_table(model_class: type) -> None:
-    """Ensure table exists using model's __create_sql__. Idempotent."""
+    """Ensure table exists using model's __create_sql__. Idempotent, runs once per model per process."""
+    if model_class in _ensured_tables:
+        return
+
     if engine is None:
         raise RuntimeError("Database engine not initialized.")
 
     if not hasattr(model_class, '__create_sql__'):
         raise ValueError(f"{model_class.__name__} missing __create_sql__ attribute")
 
-    from sqlalchemy import text
+    with _ensured_tables_lock:
+        if model_class in _ensured_tables:
+            return
+        with engine.begin() as conn:
+            conn.execute(text(model_class.__create_sql__))
+        _ensured_tables.add(model_class)
+
+
+def _merge_statement(model_class: type, attrs: tuple[str, ...]) -> TextClause:
+    """
+    Build (and cache) a single-roundtrip T-SQL MERGE upsert for the given
+    attributes, matched on __upsert_keys__. Bind params are named after the
+    column keys, plus :created_at / :updated_at.
+    """
+    cache_key = (model_class, attrs)
+    stmt = _merge_statements.get(cache_key)
+    if stmt is not None:
+        return stmt
+
+    mapper_columns = model_class.__mapper__.columns
+    table = model_class.__table__
+    key_columns = [mapper_columns[k] for k in model_class.__upsert_keys__]
+    value_columns = [mapper_columns[a] for a in attrs]
+    update_columns = [c for c in value_columns if c not in key_columns]
+    created_col = mapper_columns["created_at"].name
+    updated_col = mapper_columns["updated_at"].name
+    pk_col = next(iter(table.primary_key.columns)).name
+
+    source_cols = ", ".join(f"[{c.name}]" for c in value_columns)
+    set_clause = ", ".join(
+        [f"tgt.[{c.name}] = src.[{c.name}]" for c in update_columns] + [f"tgt.[{updated_col}] = :updated_at"]
+    )
+    stmt = text(f"""
+    MERGE INTO [{table.name}] WITH (HOLDLOCK) AS tgt
+    USING (VALUES ({", ".join(f":{c.key}" for c in value_columns)})) AS src ({source_cols})
+    ON {" AND ".join(f"tgt.[{c.name}] = src.[{c.name}]" for c in key_columns)}
+    WHEN MATCHED THEN
+        UPDATE SET {set_clause}
+    WHEN NOT MATCHED THEN
+        INSERT ({source_cols}, [{created_col}])
+        VALUES ({", ".join(f"src.[{c.name}]" for c in value_columns)}, :created_at)
+    OUTPUT $action AS action, INSERTED.[{pk_col}] AS id;
+    """)
+    _merge_statements[cache_key] = stmt
+    return stmt
+
+
+def _merge_upsert(model_class: type, data: dict) -> tuple[str, int]:
+    """Upsert via MERGE in one roundtrip. Returns ("created"|"updated", record_id)."""
+    mapper_columns = model_class.__mapper__.columns
+    column_keys = model_class.column_keys() - {"id", "created_at", "updated_at"}
+    values = {k: v for k, v in data.items() if k in column_keys and v is not None}
+
+    now = datetime.datetime.utcnow()
+    params = {mapper_columns[k].key: v for k, v in values.items()}
+    params.update(created_at=now, updated_at=now)
+
+    stmt = _merge_statement(model_class, tuple(sorted(values)))
     with engine.begin() as conn:
-        conn.execute(text(model_class.__create_sql__))
+        row = conn.execute(stmt, params).one()
+    return ("created" if row.action == "INSERT" else "updated"), row.id
+
+
+def _core_upsert(model_class: type, data: dict, filters: dict) -> tuple[str, int]:
+    """
+    Portable upsert with Core statements (no ORM hydration): probe the primary
+    key by __upsert_keys__, then UPDATE by primary key or INSERT. Returns
+    ("created"|"updated", record_id).
+    """
+    table = model_class.__table__
+    mapper_columns = model_class.__mapper__.columns
+    pk_column = next(iter(table.primary_key.columns))
+    column_keys = model_class.column_keys() - {"id"}
+    row = {mapper_columns[k].key: v for k, v in data.items()
+           if k in column_keys and v is not None}
+
+    with engine.begin() as conn:
+        existing_id = conn.execute(
+            select(pk_column).where(*(mapper_columns[k] == v for k, v in filters.items()))
+        ).scalar_one_or_none()
+
+        if existing_id is None:
+            return "created", _insert_returning_id(conn, table, row)
+
+        row[mapper_columns["updated_at"].key] = datetime.datetime.utcnow()
+        conn.execute(update(table).where(pk_column == existing_id).values(row))
+        return "updated", existing_id
 
 
 def upsert(model_class: type, data: dict) -> dict:
@@ -117,36 +225,17 @@ def upsert(model_class: type, data: dict) -> dict:
         return {"status_code": 400, "message": f"Missing required upsert keys: {missing_keys}"}
 
     try:
-        with get_session() as session:
-            query = session.query(model_class)
-            for key, value in filters.items():
-                query = query.filter(getattr(model_class, key) == value)
-            existing = query.one_or_none()
-
-            if existing:
-                for attr, value in data.items():
-                    if hasattr(existing, attr) and value is not None:
-                        setattr(existing, attr, value)
-                existing.updated_at = datetime.datetime.utcnow()
-                session.flush()
-                return {
-                    "status_code": 200,
-                    "message": f"{model_class.__tablename__} updated",
-                    "action": "updated",
-                    "record_id": existing.id
-                }
-            else:
-                valid_attrs = {k: v for k, v in data.items()
-                             if hasattr(model_class, k) and v is not None}
-                record = model_class(**valid_attrs)
-                session.add(record)
-                session.flush()
-                return {
-                    "status_code": 201,
-                    "message": f"{model_class.__tablename__} created",
-                    "action": "created",
-                    "record_id": record.id
-                }
+        if engine is not None and engine.dialect.name == "mssql":
+            action, record_id = _merge_upsert(model_class, data)
+        else:
+            action, record_id = _core_upsert(model_class, data, filters)
     except Exception as e:
         logging.exception(f"Error in upsert for {model_class.__tablename__}: {e}")
         return {"status_code": 500, "message": f"Database error: {str(e)}"}
+
+    return {
+        "status_code": 201 if action == "created" else 200,
+        "message": f"{model_class.__tablename__} {action}",
+        "action": action,
+        "record_id": record_id
+    }
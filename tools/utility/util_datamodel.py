@@ -7,7 +7,7 @@ Models: AgentConfig, TaskLog, LLMTokenUsage
 
 import logging
 from datetime import datetime, date
-from typing import Any, Dict
+from typing import Any, Dict, FrozenSet, Tuple
 
 from sqlalchemy import (
     Column,
@@ -48,15 +48,32 @@ class IdMixin:
 class BaseModel(Base, IdMixin, TimestampMixin):
     __abstract__ = True
 
+    @classmethod
+    def _column_spec(cls) -> Tuple[FrozenSet[str], Tuple[Tuple[str, str], ...]]:
+        """
+        (column attribute keys, (python_attr, sql_name) pairs), computed once
+        per model. Lazy because the mapper doesn't exist until the class body
+        has been fully declared.
+        """
+        spec = cls.__dict__.get("_column_spec_cache")
+        if spec is None:
+            column_attrs = sqlalchemy_inspect(cls).column_attrs
+            spec = (
+                frozenset(attr.key for attr in column_attrs),
+                tuple((attr.key, attr.columns[0].name) for attr in column_attrs),
+            )
+            cls._column_spec_cache = spec
+        return spec
+
+    @classmethod
+    def column_keys(cls) -> FrozenSet[str]:
+        """Python attribute names of all mapped columns."""
+        return cls._column_spec()[0]
+
     def to_dict(self) -> Dict[str, Any]:
-        """Convert model to dict using SQLAlchemy mapper."""
-        mapper = sqlalchemy_inspect(self.__class__)
+        """Convert model to dict keyed by SQL column name."""
         d: Dict[str, Any] = {}
-        for attr in mapper.attrs:
-            if not hasattr(attr, 'columns') or len(attr.columns) == 0:
-                continue
-            sql_name = attr.columns[0].name
-            python_attr = attr.key
+        for python_attr, sql_name in self._column_spec()[1]:
             value = getattr(self, python_attr)
             if isinstance(value, (datetime, date)):
                 value = value.isoformat()
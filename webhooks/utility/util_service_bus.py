@@ -3,17 +3,50 @@ Service Bus utilities for webhooks layer.
 
 Provides:
 - Queue existence checking and creation
-- Message publishing to queues
+- Message publishing to queues (shared client and per-queue senders)
+- Optional micro-batching: batched publishes are flushed per queue, in
+  size-limited message batches, once SB_PUBLISH_MAX_BATCH messages are
+  waiting or after SB_PUBLISH_MAX_DELAY_MS
 """
 
 import os
 import json
+import atexit
 import logging
+import threading
+
+try:
+    from azure.core.exceptions import ResourceNotFoundError
+    from azure.servicebus import ServiceBusClient, ServiceBusMessage
+    from azure.servicebus.exceptions import MessageSizeExceededError
+    from azure.servicebus.management import ServiceBusAdministrationClient
+    _SB_AVAILABLE = True
+except ImportError as e:
+    logging.warning(f"azure-servicebus not available - Service Bus operations disabled: {e}")
+    _SB_AVAILABLE = False
 
 SERVICE_BUS_CONNECTION_STRING = os.getenv("SERVICE_BUS_CONNECTION_STRING")
 
-# Cache for queues we've verified exist
-_verified_queues: set = set()
+# Shared client and queue senders, reused across publishes
+_sb_client = None
+_sb_senders: dict = {}
+_sb_lock = threading.Lock()
+
+# Micro-batching of publishes per queue
+SB_PUBLISH_MAX_BATCH = 20
+SB_PUBLISH_MAX_DELAY_MS = 50
+
+_pending: dict[str, list] = {}
+_pending_timers: dict[str, threading.Timer] = {}
+_pending_lock = threading.Lock()
+
+# Sync senders are not thread-safe; timer flushes and direct sends share this
+_send_lock = threading.Lock()
+
+# Cache for queues we've verified exist; replaced (never mutated) under the
+# lock so membership checks need no locking
+_verified_queues: frozenset[str] = frozenset()
+_verified_lock = threading.Lock()
 
 
 def ensure_queue_exists(queue_name: str) -> bool:
@@ -31,54 +64,179 @@ def ensure_queue_exists(queue_name: str) -> bool:
         logging.warning("SERVICE_BUS_CONNECTION_STRING not configured - cannot verify queue")
         return False
 
-    try:
-        from azure.servicebus.management import ServiceBusAdministrationClient
+    if not _SB_AVAILABLE:
+        logging.warning("azure-servicebus not installed - cannot verify queue")
+        return False
 
+    try:
         with ServiceBusAdministrationClient.from_connection_string(SERVICE_BUS_CONNECTION_STRING) as admin_client:
             try:
                 admin_client.get_queue(queue_name)
                 logging.info(f"Queue '{queue_name}' exists")
-                _verified_queues.add(queue_name)
-                return True
-            except Exception as e:
-                if "not found" in str(e).lower() or "does not exist" in str(e).lower():
-                    logging.info(f"Queue '{queue_name}' not found, creating...")
-                    admin_client.create_queue(queue_name)
-                    logging.info(f"Queue '{queue_name}' created successfully")
-                    _verified_queues.add(queue_name)
-                    return True
-                else:
-                    raise
+            except ResourceNotFoundError:
+                logging.info(f"Queue '{queue_name}' not found, creating...")
+                admin_client.create_queue(queue_name)
+                logging.info(f"Queue '{queue_name}' created successfully")
+
+            with _verified_lock:
+                _verified_queues = _verified_queues | {queue_name}
+            return True
     except Exception as e:
         logging.exception(f"Failed to ensure queue '{queue_name}' exists: {e}")
         return False
 
 
-def publish_to_service_bus(queue_name: str, message: dict, ensure_queue: bool = True) -> bool:
+def _get_sender(queue_name: str):
+    """Get a cached sender for the queue, creating the shared client on first use."""
+    global _sb_client
+
+    sender = _sb_senders.get(queue_name)
+    if sender is not None:
+        return sender
+
+    with _sb_lock:
+        sender = _sb_senders.get(queue_name)
+        if sender is not None:
+            return sender
+
+        if _sb_client is None:
+            _sb_client = ServiceBusClient.from_connection_string(SERVICE_BUS_CONNECTION_STRING)
+
+        sender = _sb_client.get_queue_sender(queue_name)
+        _sb_senders[queue_name] = sender
+        return sender
+
+
+def _send_batched(sender, messages: list) -> int:
+    """
+    Send messages in as few size-limited message batches as possible.
+    A message too large for any batch is logged and skipped. Returns the number sent.
+    """
+    sent = 0
+    batch = sender.create_message_batch()
+
+    for message in messages:
+        try:
+            batch.add_message(message)
+            continue
+        except MessageSizeExceededError:
+            if len(batch) == 0:
+                logging.error("Message exceeds the Service Bus batch size limit, dropped")
+                continue
+
+        sender.send_messages(batch)
+        sent += len(batch)
+        batch = sender.create_message_batch()
+        try:
+            batch.add_message(message)
+        except MessageSizeExceededError:
+            logging.error("Message exceeds the Service Bus batch size limit, dropped")
+
+    if len(batch) > 0:
+        sender.send_messages(batch)
+        sent += len(batch)
+    return sent
+
+
+def _flush(queue_name: str) -> None:
+    """Send all pending messages for a queue as size-limited batches. Failures are logged."""
+    with _pending_lock:
+        timer = _pending_timers.pop(queue_name, None)
+        if timer is not None:
+            timer.cancel()
+        messages = _pending.pop(queue_name, [])
+
+    if not messages:
+        return
+
+    try:
+        with _send_lock:
+            sent = _send_batched(_get_sender(queue_name), messages)
+        logging.info(f"Flushed {sent} of {len(messages)} message(s) to queue '{queue_name}'")
+    except Exception as e:
+        logging.exception(f"Failed to flush {len(messages)} message(s) to queue '{queue_name}': {e}")
+
+
+def _enqueue(queue_name: str, sb_message) -> None:
+    """Add a message to the queue's pending batch, flushing when it is full."""
+    with _pending_lock:
+        batch = _pending.setdefault(queue_name, [])
+        batch.append(sb_message)
+        full = len(batch) >= SB_PUBLISH_MAX_BATCH
+        if not full and queue_name not in _pending_timers:
+            timer = threading.Timer(SB_PUBLISH_MAX_DELAY_MS / 1000, _flush, args=(queue_name,))
+            timer.daemon = True
+            _pending_timers[queue_name] = timer
+            timer.start()
+
+    if full:
+        _flush(queue_name)
+
+
+def _close_sb() -> None:
+    """Flush pending batches, then close cached senders and the shared client on shutdown."""
+    global _sb_client
+
+    for queue_name in list(_pending):
+        _flush(queue_name)
+
+    with _sb_lock:
+        for sender in _sb_senders.values():
+            try:
+                sender.close()
+            except Exception:
+                pass
+        _sb_senders.clear()
+
+        if _sb_client is not None:
+            try:
+                _sb_client.close()
+            except Exception:
+                pass
+            _sb_client = None
+
+
+atexit.register(_close_sb)
+
+
+def publish_to_service_bus(
+    queue_name: str,
+    message: dict,
+    ensure_queue: bool = True,
+    batched: bool = False
+) -> bool:
     """
     Publish a single message to Service Bus queue.
     Returns True if successful, False otherwise.
+
+    With batched=True the message is queued for the next micro-batch flush
+    and True is returned optimistically; flush failures are only logged.
     """
     if not SERVICE_BUS_CONNECTION_STRING:
         logging.warning("SERVICE_BUS_CONNECTION_STRING not configured - message not sent")
         return False
 
+    if not _SB_AVAILABLE:
+        logging.warning("azure-servicebus not installed - message not sent")
+        return False
+
     if ensure_queue and not ensure_queue_exists(queue_name):
         logging.error(f"Queue '{queue_name}' does not exist and could not be created")
         return False
 
     try:
-        from azure.servicebus import ServiceBusClient, ServiceBusMessage
-
-        with ServiceBusClient.from_connection_string(SERVICE_BUS_CONNECTION_STRING) as client:
-            with client.get_queue_sender(queue_name) as sender:
-                sb_message = ServiceBusMessage(
-                    json.dumps(message),
-                    content_type="application/json"
-                )
-                sender.send_messages(sb_message)
-                logging.info(f"Message published to queue '{queue_name}'")
-                return True
+        sb_message = ServiceBusMessage(
+            json.dumps(message),
+            content_type="application/json"
+        )
+        if batched:
+            _enqueue(queue_name, sb_message)
+            return True
+
+        with _send_lock:
+            _get_sender(queue_name).send_messages(sb_message)
+        logging.info(f"Message published to queue '{queue_name}'")
+        return True
     except Exception as e:
         logging.exception(f"Failed to publish to Service Bus queue '{queue_name}': {e}")
         return False
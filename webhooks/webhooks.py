@@ -10,6 +10,7 @@ This layer:
 
 import azure.functions as func
 import logging
+import orjson
 
 from shared import json_response
 from webhooks.utility.util_service_bus import publish_to_service_bus
@@ -26,6 +27,9 @@ WEBHOOK_CONFIG = {
     # },
 }
 
+# Sources are matched against the lower-cased route segment
+WEBHOOK_CONFIG = {k.lower(): v for k, v in WEBHOOK_CONFIG.items()}
+
 
 # =============================================================================
 # WEBHOOK ENDPOINT
@@ -58,9 +62,10 @@ def webhook_handler(req: func.HttpRequest) -> func.HttpResponse:
     queue_name = config["queue"]
     handler = config["handler"]
 
+    raw_body = req.get_body()
     try:
-        body = req.get_json() if req.get_body() else {}
-    except Exception as e:
+        body = orjson.loads(raw_body) if raw_body else {}
+    except orjson.JSONDecodeError as e:
         logging.warning(f"Failed to parse webhook body: {e}")
         body = {}
 
@@ -89,7 +94,7 @@ def webhook_handler(req: func.HttpRequest) -> func.HttpResponse:
             "queued": False,
         }, 200)
 
-    success = publish_to_service_bus(queue_name, message, ensure_queue=False)
+    success = publish_to_service_bus(queue_name, message, ensure_queue=False, batched=True)
 
     return json_response({
         "status": "processed" if success else "error",